@@ -4,6 +4,7 @@ Loads & validates environment variables.
 """
 
 import json
+from functools import lru_cache
 from typing import List, Optional
 
 from pydantic import Field, field_validator
@@ -120,5 +121,8 @@ class Settings(BaseSettings):
         return value
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    # Parsed once per process; call get_settings.cache_clear() after
+    # changing the environment.
     return Settings()
@@ -37,6 +37,15 @@ def apply_attribution_migration() -> None:
         logger.info(f"Applied attribution migrations: {', '.join(applied)}")
 
 
+def apply_digest_algo_migration() -> None:
+    """Add the knowledge file digest algorithm column and rekey legacy digests."""
+    from .migrations.add_knowledge_digest_algo import run_migration
+
+    applied = run_migration(engine)
+    if applied:
+        logger.info(f"Applied knowledge digest migrations: {', '.join(applied)}")
+
+
 def init_database() -> None:
     """
     Initialize the database by creating all tables.
@@ -51,7 +60,8 @@ def init_database() -> None:
         logger.info(f"Detected database backend: {backend}")
 
         db_path = None
-        if backend == "sqlite":
+        if backend == "sqlite" and url.query.get("mode") != "memory":
+            # URI-style in-memory databases have no file for sqlite3 to migrate
             db_path = url.database or "chatbot.db"
             Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
@@ -65,6 +75,7 @@ def init_database() -> None:
             logger.info("Skipping SQLite-specific migrations for non-SQLite backend.")
 
         apply_attribution_migration()
+        apply_digest_algo_migration()
 
         from sqlalchemy import inspect
 
@@ -0,0 +1,85 @@
+"""Record which hash algorithm produced each knowledge file digest."""
+
+import os
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .. import routes_knowledge
+from .add_flywheel_attribution import _add_column
+
+
+def run_migration(engine: Engine) -> list[str]:
+    """
+    Add knowledge_files.digest_algo; existing rows are SHA256 digests.
+
+    When the column is added, the existing rows are rekeyed with BLAKE3 in
+    the same step (see `backfill_digests`), so this runs once per database.
+    """
+    if "knowledge_files" not in set(inspect(engine).get_table_names()):
+        return []
+
+    definition = "VARCHAR(16) NOT NULL DEFAULT 'sha256'"
+    if not _add_column(engine, "knowledge_files", "digest_algo", definition):
+        return []
+
+    applied = ["knowledge_files.digest_algo"]
+    rehashed = backfill_digests(engine, routes_knowledge.ensure_uploads_directory())
+    if rehashed:
+        applied.append(f"knowledge_files.sha256 ({len(rehashed)} rehashed with blake3)")
+    return applied
+
+
+def backfill_digests(engine: Engine, uploads_dir: str) -> list[str]:
+    """
+    Rehash SHA256-keyed knowledge files with BLAKE3 when it is installed.
+
+    Uploads are deduplicated by a single digest lookup, so rows stored
+    before blake3 was available must be rekeyed. Each stored file is read
+    back from `uploads_dir` and renamed to the new digest prefix inside the
+    transaction that updates its row; the rename is reverted if the update
+    does not commit. Rows whose file is missing or whose content is already
+    stored under BLAKE3 keep their SHA256 digest.
+
+    Returns:
+        Filenames of the rows that were rehashed
+    """
+    if routes_knowledge.blake3 is None:
+        return []
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text("SELECT id, filename, sha256 FROM knowledge_files WHERE digest_algo = 'sha256'")
+        ).all()
+
+    rehashed: list[str] = []
+    for file_id, filename, digest in rows:
+        old_path = os.path.join(uploads_dir, f"{digest[:16]}_{filename}")
+        try:
+            with open(old_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            continue
+
+        digest_algo, new_digest = routes_knowledge.calculate_digest(content)
+        new_path = os.path.join(uploads_dir, f"{new_digest[:16]}_{filename}")
+        renamed = False
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "UPDATE knowledge_files SET sha256 = :digest, digest_algo = :algo "
+                        "WHERE id = :id"
+                    ),
+                    {"digest": new_digest, "algo": digest_algo, "id": file_id},
+                )
+                os.replace(old_path, new_path)
+                renamed = True
+        except (SQLAlchemyError, OSError):
+            if renamed:
+                os.replace(new_path, old_path)
+            continue
+
+        rehashed.append(filename)
+    return rehashed
@@ -167,7 +167,8 @@ class KnowledgeFile(Base):
         filename: Original filename
         content_type: MIME type of the file
         size: File size in bytes
-        sha256: SHA256 hash of the file content
+        sha256: Content digest (algorithm recorded in digest_algo)
+        digest_algo: Hash algorithm used for the digest ("sha256" or "blake3")
         created_at: When the file was uploaded
     """
     __tablename__ = "knowledge_files"
@@ -176,7 +177,14 @@ class KnowledgeFile(Base):
     filename = Column(String(255), nullable=False, comment="Original filename")
     content_type = Column(String(100), nullable=False, comment="MIME type of the file")
     size = Column(Integer, nullable=False, comment="File size in bytes")
-    sha256 = Column(String(64), nullable=False, unique=True, comment="SHA256 hash of file content")
+    sha256 = Column(String(64), nullable=False, unique=True, comment="Content digest of the file")
+    digest_algo = Column(
+        String(16),
+        nullable=False,
+        default="sha256",
+        server_default="sha256",
+        comment="Hash algorithm used for the content digest",
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="File upload time")
 
     def __repr__(self) -> str:
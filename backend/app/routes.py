@@ -5,10 +5,10 @@ This module contains all the API endpoints for chat functionality,
 feedback collection, configuration management, and chat history.
 """
 
-from typing import List, Optional
+from typing import List
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 import uuid
 from sqlalchemy.exc import SQLAlchemyError
@@ -16,15 +16,19 @@ from sqlalchemy import func, desc
 import time
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
 from .config import get_settings
-from .utils import setup_logging, sanitize_user_input, format_error_response
+from .utils import setup_logging, sanitize_user_input
 from .db import SessionLocal
 from .models import ChatHistory, Feedback, ChatbotConfig
 from .schemas import ChatRequest, FeedbackCreate, ChatbotConfigCreate, ChatbotConfigOut
 from .knowledge_processor import KnowledgeProcessor
-from .auth import verify_bearer_token
 from .experiments import select_chat_configuration
-from .services.llm import llm, chat
+from .services.llm import chat
 
 # Initialize settings and logging
 settings = get_settings()
@@ -33,6 +37,12 @@ logger = setup_logging()
 router = APIRouter(tags=["chatbot"])
 
 
+def _sse_event(payload: dict) -> bytes:
+    """Frame a payload as a single server-sent `data:` event."""
+    if orjson is not None:
+        return b"data: " + orjson.dumps(payload) + b"\n\n"
+    return f"data: {json.dumps(payload)}\n\n".encode()
+
 
 def get_db() -> Session:
     """
@@ -195,9 +205,6 @@ async def get_feedback(
 # -------------------------------
 # Chat Endpoint with Dynamic Config
 # -------------------------------
-from fastapi import Request, Query
-from fastapi.responses import StreamingResponse
-
 @router.post("/chat", response_model=None)
 async def chat_with_bot(
     request: ChatRequest,
@@ -219,7 +226,7 @@ async def chat_with_bot(
     """
     try:
         stream = request.stream or False
-        logger.info(f"Processing chat request (streaming: {stream})")
+        logger.info("Processing chat request (streaming: %s)", stream)
 
         # Sanitize user input
         sanitized_message = sanitize_user_input(request.message)
@@ -237,6 +244,11 @@ async def chat_with_bot(
             session_id,
             is_new_session=is_new_session,
         )
+        # Resolve attribution up front: streaming generators run after the
+        # request's session has committed, when ORM attributes are expired.
+        config_id = config.id if config else None
+        experiment_id = experiment.id if experiment else None
+        experiment_name = experiment.name if experiment else None
 
         lower_message = sanitized_message.lower()
         time_triggers = (
@@ -252,8 +264,8 @@ async def chat_with_bot(
                 role="user",
                 content=sanitized_message,
                 user_id=request.user_id,
-                config_id=config.id if config else None,
-                experiment_id=experiment.id if experiment else None,
+                config_id=config_id,
+                experiment_id=experiment_id,
             )
             db.add(user_chat)
             db.commit()
@@ -266,8 +278,8 @@ async def chat_with_bot(
                 session_id=user_chat.session_id,
                 role="assistant",
                 content=reply_text,
-                config_id=config.id if config else None,
-                experiment_id=experiment.id if experiment else None,
+                config_id=config_id,
+                experiment_id=experiment_id,
                 model_name="system-clock",
                 latency_ms=0,
             )
@@ -275,20 +287,20 @@ async def chat_with_bot(
             db.commit()
             db.refresh(assistant_chat)
 
-            logger.info(f"Handled time request with direct response: {current_time_iso}")
+            logger.info("Handled time request with direct response: %s", current_time_iso)
 
             if stream:
                 async def stream_time():
                     payload = {
                         "reply": reply_text,
-                        "session_id": user_chat.session_id,
+                        "session_id": session_id,
                         "assistant_message_id": assistant_chat.id,
-                        "config_id": config.id if config else None,
-                        "experiment_id": experiment.id if experiment else None,
-                        "experiment_name": experiment.name if experiment else None,
+                        "config_id": config_id,
+                        "experiment_id": experiment_id,
+                        "experiment_name": experiment_name,
                         "model": "system-clock",
                     }
-                    yield f"data: {json.dumps(payload)}\n\n"
+                    yield _sse_event(payload)
 
                 headers = {
                     "Content-Type": "text/event-stream",
@@ -305,9 +317,9 @@ async def chat_with_bot(
                 "reply": reply_text,
                 "session_id": user_chat.session_id,
                 "assistant_message_id": assistant_chat.id,
-                "config_id": config.id if config else None,
-                "experiment_id": experiment.id if experiment else None,
-                "experiment_name": experiment.name if experiment else None,
+                "config_id": config_id,
+                "experiment_id": experiment_id,
+                "experiment_name": experiment_name,
                 "model": "system-clock",
             }
 
@@ -315,7 +327,7 @@ async def chat_with_bot(
         knowledge_processor = KnowledgeProcessor()
         knowledge_snippets = knowledge_processor.search_knowledge(sanitized_message, db)
 
-        logger.info(f"Found {len(knowledge_snippets)} relevant knowledge snippets")
+        logger.info("Found %s relevant knowledge snippets", len(knowledge_snippets))
 
         # Load latest chatbot configuration
         if config:
@@ -340,9 +352,9 @@ async def chat_with_bot(
             system_prompt += knowledge_context
             system_prompt += "\nPlease use the above information to provide accurate and helpful responses. Always cite the source filename when referencing information from the knowledge base."
 
-        logger.info(f"Using model: {model}, temperature: {temperature}")
+        logger.info("Using model: %s, temperature: %s", model, temperature)
         if knowledge_snippets:
-            logger.info(f"Enhanced prompt with {len(knowledge_snippets)} knowledge snippets")
+            logger.info("Enhanced prompt with %s knowledge snippets", len(knowledge_snippets))
 
         # Load conversation history for the session
         if request.session_id:
@@ -371,8 +383,8 @@ async def chat_with_bot(
             role='user',
             content=sanitized_message,
             user_id=request.user_id,
-            config_id=config.id if config else None,
-            experiment_id=experiment.id if experiment else None,
+            config_id=config_id,
+            experiment_id=experiment_id,
         )
         db.add(user_chat)
         db.commit()  # Commit user message before streaming to prevent data loss
@@ -384,10 +396,10 @@ async def chat_with_bot(
                 full_response = ""
                 response_data = {
                     "reply": "",
-                    "session_id": user_chat.session_id,
-                    "config_id": config.id if config else None,
-                    "experiment_id": experiment.id if experiment else None,
-                    "experiment_name": experiment.name if experiment else None,
+                    "session_id": session_id,
+                    "config_id": config_id,
+                    "experiment_id": experiment_id,
+                    "experiment_name": experiment_name,
                     "model": model,
                 }
                 start_time = time.time()
@@ -419,16 +431,16 @@ async def chat_with_bot(
                             total_tokens += 1
                             full_response += token_or_metadata
                             response_data['reply'] = full_response
-                            yield f"data: {json.dumps(response_data)}\n\n"
+                            yield _sse_event(response_data)
                         elif isinstance(token_or_metadata, dict):
                             # Stream ended, commit chat history
                             try:
                                 assistant_chat = ChatHistory(
-                                    session_id=user_chat.session_id,
+                                    session_id=session_id,
                                     role='assistant',
                                     content=full_response,
-                                    config_id=config.id if config else None,
-                                    experiment_id=experiment.id if experiment else None,
+                                    config_id=config_id,
+                                    experiment_id=experiment_id,
                                     model_name=model,
                                     latency_ms=int((time.time() - start_time) * 1000),
                                 )
@@ -436,30 +448,30 @@ async def chat_with_bot(
                                 db.commit()
                                 db.refresh(assistant_chat)
                                 response_data["assistant_message_id"] = assistant_chat.id
-                                yield f"data: {json.dumps(response_data)}\n\n"
+                                yield _sse_event(response_data)
 
                                 # Log streaming performance
                                 latency_ms = assistant_chat.latency_ms
                                 logger.info(
                                     f"Streamed chat processed. "
-                                    f"Session: {user_chat.session_id}, "
+                                    f"Session: {session_id}, "
                                     f"Tokens: {total_tokens}, "
                                     f"Latency: {latency_ms}ms"
                                 )
                             except Exception as commit_error:
-                                logger.error(f"Database commit error: {commit_error}")
+                                logger.error("Database commit error: %s", commit_error)
                                 stream_error = True
 
                 except Exception as stream_exception:
                     # Handle streaming errors
-                    logger.error(f"Streaming error: {stream_exception}")
+                    logger.error("Streaming error: %s", stream_exception)
                     stream_error = True
                     error_data = {
                         'error': 'Streaming failed',
                         'details': str(stream_exception),
-                        'session_id': user_chat.session_id
+                        'session_id': session_id
                     }
-                    yield f"data: {json.dumps(error_data)}\n\n"
+                    yield _sse_event(error_data)
 
                 # Final error handling
                 if stream_error:
@@ -503,15 +515,15 @@ async def chat_with_bot(
                     "relevance_score": round(snippet['score'], 2)
                 })
             response_data["knowledge_sources"] = sources
-            logger.info(f"Response enhanced with {len(sources)} knowledge sources")
+            logger.info("Response enhanced with %s knowledge sources", len(sources))
 
         # Save assistant reply to database
         assistant_chat = ChatHistory(
             session_id=user_chat.session_id,
             role='assistant',
             content=reply,
-            config_id=config.id if config else None,
-            experiment_id=experiment.id if experiment else None,
+            config_id=config_id,
+            experiment_id=experiment_id,
             model_name=model,
             latency_ms=llm_response.get(
                 "latency_ms",
@@ -522,14 +534,14 @@ async def chat_with_bot(
         db.commit()
         db.refresh(assistant_chat)
 
-        logger.info(f"Chat processed successfully. Session ID: {user_chat.session_id}")
+        logger.info("Chat processed successfully. Session ID: %s", user_chat.session_id)
         return {
             **response_data,
             "session_id": user_chat.session_id,
             "assistant_message_id": assistant_chat.id,
-            "config_id": config.id if config else None,
-            "experiment_id": experiment.id if experiment else None,
-            "experiment_name": experiment.name if experiment else None,
+            "config_id": config_id,
+            "experiment_id": experiment_id,
+            "experiment_name": experiment_name,
             "model": model,
         }
 
@@ -537,7 +549,7 @@ async def chat_with_bot(
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error processing chat: {str(e)}")
+        logger.error("Error processing chat: %s", e)
         db.rollback()
 
         # Check if it's an OpenAI API error
@@ -8,12 +8,17 @@ under the /api/v1/knowledge path.
 import os
 import hashlib
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import desc
 
+try:
+    import blake3
+except ImportError:  # pragma: no cover - blake3 is an optional speedup
+    blake3 = None
+
 from .utils import setup_logging
 from .db import SessionLocal
 from .models import KnowledgeFile
@@ -31,6 +36,9 @@ ALLOWED_CONTENT_TYPES = {
     "text/plain": ".txt"
 }
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+_UNSUPPORTED_TYPE_DETAIL = (
+    "File type {} not supported. Allowed types: " + ", ".join(ALLOWED_CONTENT_TYPES)
+)
 
 def get_db() -> Session:
     """
@@ -61,6 +69,45 @@ def calculate_sha256(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
+def calculate_digest(content: bytes) -> tuple[str, str]:
+    """
+    Calculate the content digest used for deduplication.
+
+    Uses BLAKE3 when the optional `blake3` package is installed and falls
+    back to SHA256 otherwise. Both produce 64 hex characters.
+
+    Returns:
+        Tuple of (algorithm name, hex digest)
+    """
+    if blake3 is not None:
+        return "blake3", blake3.blake3(content).hexdigest()
+    return "sha256", calculate_sha256(content)
+
+
+def find_duplicate_file(db: Session, digest: str):
+    """
+    Return an existing knowledge file with identical content, if any.
+
+    Files stored before the digest_algo migration are rekeyed with BLAKE3
+    when it runs (see migrations.add_knowledge_digest_algo). Rows that keep
+    a SHA256 digest are not matched against BLAKE3 uploads: those whose
+    file was missing from disk then, and those stored while blake3 was not
+    installed.
+    """
+    return db.query(KnowledgeFile).filter(KnowledgeFile.sha256 == digest).first()
+
+
+def remove_uploaded_file(file_path: str) -> None:
+    """Remove a stored upload from disk; scheduled after the response is sent."""
+    try:
+        os.remove(file_path)
+        logger.info(f"Physical file deleted: {file_path}")
+    except FileNotFoundError:
+        logger.warning(f"Physical file not found: {file_path}")
+    except OSError as e:
+        logger.error(f"Failed to delete physical file {file_path}: {str(e)}")
+
+
 def ensure_uploads_directory():
     """Ensure uploads directory exists."""
     uploads_dir = "uploads"
@@ -95,7 +142,15 @@ async def upload_file(
         if file.content_type not in ALLOWED_CONTENT_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File type {file.content_type} not supported. Allowed types: {list(ALLOWED_CONTENT_TYPES.keys())}"
+                detail=_UNSUPPORTED_TYPE_DETAIL.format(file.content_type)
+            )
+
+        # Reject oversized uploads from the spooled size before reading
+        # them into memory
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File size {file.size} bytes exceeds maximum allowed size of {MAX_FILE_SIZE} bytes"
             )
 
         # Read file content
@@ -115,11 +170,11 @@ async def upload_file(
                 detail="File is empty"
             )
 
-        # Calculate SHA256 hash
-        sha256_hash = calculate_sha256(content)
+        # Calculate content digest
+        digest_algo, digest = calculate_digest(content)
 
-        # Check if file with same hash already exists
-        existing_file = db.query(KnowledgeFile).filter(KnowledgeFile.sha256 == sha256_hash).first()
+        # Check if file with same content already exists
+        existing_file = find_duplicate_file(db, digest)
         if existing_file:
             logger.warning(f"File with same content already exists: {existing_file.filename}")
             raise HTTPException(
@@ -132,7 +187,7 @@ async def upload_file(
 
         # Generate unique filename to avoid conflicts
         file_extension = ALLOWED_CONTENT_TYPES[file.content_type]
-        safe_filename = f"{sha256_hash[:16]}_{file.filename}"
+        safe_filename = f"{digest[:16]}_{file.filename}"
         file_path = os.path.join(uploads_dir, safe_filename)
 
         # Save file to disk
@@ -144,7 +199,8 @@ async def upload_file(
             filename=file.filename,
             content_type=file.content_type,
             size=file_size,
-            sha256=sha256_hash
+            sha256=digest,
+            digest_algo=digest_algo
         )
 
         db.add(knowledge_file)
@@ -228,12 +284,20 @@ async def list_files(
 
 
 @router.delete("/files/{file_id}")
-async def delete_file(file_id: int, db: Session = Depends(get_db)):
+async def delete_file(
+    file_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """
     Delete a knowledge file and its metadata.
 
+    The physical file is removed in a background task once the
+    metadata deletion is committed.
+
     Args:
         file_id: File ID
+        background_tasks: Background task queue for the physical delete
         db: Database session dependency
 
     Returns:
@@ -254,24 +318,20 @@ async def delete_file(file_id: int, db: Session = Depends(get_db)):
                 detail=f"File with ID {file_id} not found"
             )
 
-        # Try to delete physical file
-        uploads_dir = "uploads"
-        file_extension = ALLOWED_CONTENT_TYPES.get(knowledge_file.content_type, "")
-        safe_filename = f"{knowledge_file.sha256[:16]}_{knowledge_file.filename}"
+        uploads_dir = ensure_uploads_directory()
+        filename = knowledge_file.filename
+        safe_filename = f"{knowledge_file.sha256[:16]}_{filename}"
         file_path = os.path.join(uploads_dir, safe_filename)
 
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Physical file deleted: {file_path}")
-        else:
-            logger.warning(f"Physical file not found: {file_path}")
-
         # Delete from database
         db.delete(knowledge_file)
         db.commit()
 
-        logger.info(f"Knowledge file deleted successfully: {knowledge_file.filename}")
-        return {"message": f"File '{knowledge_file.filename}' has been deleted"}
+        # Remove the physical file after the response is sent
+        background_tasks.add_task(remove_uploaded_file, file_path)
+
+        logger.info(f"Knowledge file deleted successfully: {filename}")
+        return {"message": f"File '{filename}' has been deleted"}
 
     except HTTPException:
         raise
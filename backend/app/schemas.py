@@ -307,14 +307,16 @@ class KnowledgeFileOut(BaseModel):
         filename: Original filename
         content_type: MIME type of the file
         size: File size in bytes
-        sha256: SHA256 hash of file content
+        sha256: Content digest of the file
+        digest_algo: Hash algorithm used for the digest
         created_at: File upload timestamp
     """
     id: int = Field(..., description="File ID")
     filename: str = Field(..., description="Original filename")
     content_type: str = Field(..., description="MIME type of the file")
     size: int = Field(..., description="File size in bytes")
-    sha256: str = Field(..., description="SHA256 hash of file content")
+    sha256: str = Field(..., description="Content digest of the file")
+    digest_algo: str = Field("sha256", description="Hash algorithm used for the digest")
     created_at: datetime = Field(..., description="File upload timestamp")
 
     model_config = {"from_attributes": True}
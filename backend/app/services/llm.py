@@ -3,28 +3,88 @@
 Minimal LLM service wrapper.
 
 - In demo/fallback/no-key mode: returns a deterministic stub (no network).
-- In real mode: calls OpenAI Chat Completions.
+- In real mode: calls OpenAI Chat Completions. Low-temperature,
+  non-streaming replies are kept in a small in-process LRU cache.
 """
 
 from __future__ import annotations
 
 import os
 import json
+import hashlib
 import logging
-from typing import AsyncGenerator, Dict, List, Optional, Union
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncGenerator, Dict, List, Optional, Union
 
 from fastapi import HTTPException
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
-def _use_stub() -> bool:
+
+def _read_stub_flag() -> bool:
     return (
         os.getenv("DEMO_MODE") == "1"
         or os.getenv("FORCE_FALLBACK") == "1"
         or not os.getenv("OPENAI_API_KEY")
     )
 
+
+# Resolved once at import; call reload_env() after changing the environment.
+_STUB: bool = _read_stub_flag()
+_CLIENT: Optional["AsyncOpenAI"] = None
+
+
+def reload_env() -> None:
+    """Re-read stub flags from the environment and drop the cached client."""
+    global _STUB, _CLIENT
+    _STUB = _read_stub_flag()
+    _CLIENT = None
+
+
+# Exact-match cache of non-streaming replies. Only near-deterministic
+# requests are cached. Reads and writes never await, so no lock is needed
+# on the event loop.
+_CACHE_MAX_ENTRIES = 1024
+_CACHE_MAX_TEMPERATURE = 0.3
+_response_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+
+def _use_stub() -> bool:
+    return _STUB
+
+
+def _get_client() -> "AsyncOpenAI":
+    """Return a shared AsyncOpenAI client so its HTTP connection pool is reused."""
+    global _CLIENT
+    if _CLIENT is None:
+        from openai import AsyncOpenAI
+        _CLIENT = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    return _CLIENT
+
+
+def _flatten(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+
+
+def _cache_key(api_params: Dict) -> tuple:
+    payload = json.dumps(
+        {k: v for k, v in api_params.items() if k not in ("model", "temperature", "stream")},
+        sort_keys=True,
+    )
+    digest = hashlib.blake2b(payload.encode(), digest_size=16).digest()
+    return (api_params["model"], round(api_params["temperature"], 2), digest)
+
+
+def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough whitespace token count of the flattened prompt, without building it."""
+    # Each message contributes its "role:" label plus the words of its content.
+    return sum(msg['content'].count(" ") + 2 for msg in messages)
+
+
 async def llm(
     prompt: str,
     model: Optional[str] = None,
@@ -42,7 +102,36 @@ async def llm(
     - frequency_penalty: Reduces repetition of tokens
     - presence_penalty: Encourages more diverse responses
     """
+    messages = [{"role": "user", "content": prompt}]
+    return await _complete(messages, prompt, model, temperature, stream, **kwargs)
+
+
+async def llm_chat(
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    stream: bool = False,
+    **kwargs
+) -> Union[str, AsyncGenerator[str, None]]:
+    """
+    Like `llm`, but sends role-tagged messages to the provider unchanged
+    instead of flattening them into a single user prompt.
+    """
+    return await _complete(messages, None, model, temperature, stream, **kwargs)
+
+
+async def _complete(
+    messages: List[Dict[str, str]],
+    prompt: Optional[str],
+    model: Optional[str],
+    temperature: float,
+    stream: bool,
+    **kwargs
+) -> Union[str, AsyncGenerator[str, None]]:
+    # The flattened prompt is only needed for stub and fallback replies.
     if _use_stub():
+        if prompt is None:
+            prompt = _flatten(messages)
         # Deterministic, CI-safe reply. Trim to keep logs tidy.
         stub_response = f"[stub] {prompt[:160]}"
         if stream:
@@ -54,14 +143,13 @@ async def llm(
 
     # --- Real provider path (OpenAI 1.x client) ---
     try:
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        client = _get_client()
         model = model or os.getenv("MODEL", "gpt-4o-mini")
 
         # Prepare OpenAI API call parameters
         api_params = {
             "model": model,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages,
             "temperature": temperature,
             "stream": stream
         }
@@ -86,7 +174,7 @@ async def llm(
                             yield token
 
                 except Exception as e:
-                    logger.error(f"Streaming error: {str(e)}")
+                    logger.error("Streaming error: %s", e)
                     raise HTTPException(
                         status_code=500,
                         detail=f"Streaming error: {str(e)}"
@@ -94,15 +182,30 @@ async def llm(
             return token_generator()
 
         # Non-Streaming Response
+        cache_key = None
+        if temperature <= _CACHE_MAX_TEMPERATURE:
+            cache_key = _cache_key(api_params)
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                _response_cache.move_to_end(cache_key)
+                return cached
+
         resp = await client.chat.completions.create(**{k: v for k, v in api_params.items() if k != 'stream'})
-        content = resp.choices[0].message.content
-        return content or ""
+        content = resp.choices[0].message.content or ""
+
+        if cache_key is not None and content:
+            _response_cache[cache_key] = content
+            if len(_response_cache) > _CACHE_MAX_ENTRIES:
+                _response_cache.popitem(last=False)
+        return content
 
     except Exception as e:
         # Log the error for debugging
-        logger.error(f"LLM request error: {str(e)}")
+        logger.error("LLM request error: %s", e)
 
         # Never crash the API; surface a safe fallback.
+        if prompt is None:
+            prompt = _flatten(messages)
         return f"[fallback-error: {type(e).__name__}] {prompt[:160]}"
 
 async def chat(
@@ -128,14 +231,13 @@ async def chat(
         Non-streaming: dict with 'content', 'usage', 'latency_ms'
         Streaming: async generator yielding tokens (str) then metadata (dict)
     """
-    # Convert messages to a single prompt
-    prompt = '\n'.join([f"{msg['role']}: {msg['content']}" for msg in messages])
+    total_tokens = _estimate_tokens(messages)
 
     # Call the main llm function with streaming flag
     if stream:
         async def response_generator():
             full_response = ""
-            generator = await llm(prompt, model=model, temperature=temperature, stream=True, max_tokens=max_tokens)
+            generator = await llm_chat(messages, model=model, temperature=temperature, stream=True, max_tokens=max_tokens)
             async for token in generator:
                 if isinstance(token, str):
                     full_response += token
@@ -144,19 +246,19 @@ async def chat(
             # Return metadata for compatibility
             yield {
                 'content': full_response,
-                'usage': {'total_tokens': len(prompt.split())},
+                'usage': {'total_tokens': total_tokens},
                 'latency_ms': 50
             }
         return response_generator()
 
     # Non-streaming response
-    response = await llm(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+    response = await llm_chat(messages, model=model, temperature=temperature, max_tokens=max_tokens)
 
     # Return in the format expected by tests
     return {
         'content': response,
-        'usage': {'total_tokens': len(prompt.split())},
+        'usage': {'total_tokens': total_tokens},
         'latency_ms': 50
     }
 
-__all__ = ["llm", "chat"]
+__all__ = ["llm", "llm_chat", "chat", "reload_env"]
@@ -0,0 +1,76 @@
+"""
+Database isolation helpers shared by the test suites.
+
+Both tests/ and backend/tests use these, so a pytest session that runs
+both suites configures the shared engine once and never recycles it
+from under the other suite.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import sessionmaker
+
+# Test data is disposable: skip fsync and keep journals in memory.
+_SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=OFF",
+    "PRAGMA journal_mode=MEMORY",
+    "PRAGMA locking_mode=EXCLUSIVE",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _on_connect(dbapi_connection, _connection_record) -> None:
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _on_begin(connection: Connection) -> None:
+    connection.exec_driver_sql("BEGIN")
+
+
+def prepare_engine(engine: Engine) -> None:
+    """
+    Let SQLAlchemy emit BEGIN on SQLite connections.
+
+    pysqlite defers BEGIN until the first DML statement, so a SAVEPOINT
+    issued first becomes the outermost transaction and RELEASE commits it.
+    Safe to call repeatedly; the hooks are installed once. Call it before
+    anything connects: installing the hooks recycles pooled connections,
+    and closing the last connection to a shared-cache in-memory database
+    destroys it.
+    """
+    if engine.dialect.name != "sqlite" or event.contains(engine, "connect", _on_connect):
+        return
+
+    event.listen(engine, "connect", _on_connect)
+    event.listen(engine, "begin", _on_begin)
+    # Recycle pooled connections so the connect hook applies to them.
+    engine.dispose()
+
+
+@contextmanager
+def rolled_back(engine: Engine, session_factory: sessionmaker) -> Iterator[Connection]:
+    """
+    Bind `session_factory` to one connection and roll it back on exit.
+
+    The sessions join the outer transaction with SAVEPOINTs, so `commit()`
+    calls in routes and tests only release a savepoint and the final
+    rollback discards everything written inside the block.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    original_kw = dict(session_factory.kw)
+    session_factory.configure(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield connection
+    finally:
+        session_factory.kw.clear()
+        session_factory.kw.update(original_kw)
+        transaction.rollback()
+        connection.close()
@@ -2,39 +2,74 @@
 Utility functions and helpers for the Data Flywheel Chatbot application.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
+import re
 import sys
 from typing import Optional
 from .config import get_settings
 
 settings = get_settings()
+_DEBUG = settings.debug
+
+# Control characters stripped from user input; tab, newline and carriage return are kept
+_CTRL_TRANSLATE = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+_CTRL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_LEVEL_MAP = {
+    "CRITICAL": logging.CRITICAL,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+}
+_APP_LOGGER = logging.getLogger("data_flywheel_chatbot")
+_CONFIGURED = False
 
 
 def setup_logging(log_level: Optional[str] = None) -> logging.Logger:
     """
     Set up application logging configuration.
     
+    Records are handed to a background listener thread through a queue so
+    request handlers never block on stdout. Use %-style arguments in log
+    calls (``logger.info("Found %s items", n)``) so messages are only
+    formatted when the level is enabled.
+    
     Args:
         log_level: Optional log level override
         
     Returns:
         Configured logger instance
     """
-    level = log_level or settings.log_level
+    global _CONFIGURED
+    if _CONFIGURED:
+        return _APP_LOGGER
+    _CONFIGURED = True
     
-    # Configure root logger
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format=settings.log_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    level = log_level or settings.log_level
     
-    # Create application logger
-    logger = logging.getLogger("data_flywheel_chatbot")
+    # Leave a root logger configured by the host application alone
+    if not logging.getLogger().handlers:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter(settings.log_format))
+        
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # Final formatting happens on the listener's stream handler
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        logging.basicConfig(
+            level=_LEVEL_MAP.get(level.upper(), logging.INFO),
+            handlers=[queue_handler]
+        )
     
-    return logger
+    return _APP_LOGGER
 
 
 def validate_openai_response(response) -> bool:
@@ -48,14 +83,10 @@ def validate_openai_response(response) -> bool:
         True if response is valid, False otherwise
     """
     try:
-        return (
-            hasattr(response, 'choices') and 
-            len(response.choices) > 0 and
-            hasattr(response.choices[0], 'message') and
-            hasattr(response.choices[0].message, 'content')
-        )
-    except Exception:
+        response.choices[0].message.content
+    except (AttributeError, IndexError, KeyError, TypeError):
         return False
+    return True
 
 
 def sanitize_user_input(user_input: str, max_length: int = 4000) -> str:
@@ -72,13 +103,11 @@ def sanitize_user_input(user_input: str, max_length: int = 4000) -> str:
     if not user_input:
         return ""
     
-    # Remove potential harmful characters and limit length
+    # Limit length, then remove null bytes and other control characters
     sanitized = user_input.strip()[:max_length]
-    
-    # Remove null bytes and other control characters
-    sanitized = ''.join(char for char in sanitized if ord(char) >= 32 or char in '\n\r\t')
-    
-    return sanitized
+    if _CTRL_RE.search(sanitized) is None:
+        return sanitized
+    return sanitized.translate(_CTRL_TRANSLATE)
 
 
 def format_error_response(error: Exception, include_details: bool = False) -> dict:
@@ -97,8 +126,8 @@ def format_error_response(error: Exception, include_details: bool = False) -> di
         "message": "An error occurred while processing your request"
     }
     
-    if include_details or settings.debug:
+    if include_details or _DEBUG:
         response["details"] = str(error)
-        response["type"] = type(error).__name__
+        response["type"] = error.__class__.__name__
     
     return response
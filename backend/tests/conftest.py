@@ -7,8 +7,28 @@ tests run in isolation with controlled environments.
 
 import os
 import pytest
-from unittest.mock import patch
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+# Environment variables for testing. They are applied at conftest import,
+# before the test modules import the app during collection, so settings
+# and app.db are built from them.
+_TEST_ENV = {
+    "DEMO_MODE": "1",  # Explicitly set to 1 for stub mode
+    "DATABASE_URL": "sqlite:///:memory:",
+    "OPENAI_API_KEY": "sk-test1234",
+    "DEBUG": "true",
+    "DEFAULT_MODEL": "gpt-4o",
+    "DEFAULT_TEMPERATURE": "0.7"
+}
+_SAVED_ENV = {key: os.environ.get(key) for key in _TEST_ENV}
+os.environ.update(_TEST_ENV)
+
+from app.config import get_settings  # noqa: E402
+from app.db import engine, Base, SessionLocal  # noqa: E402
+from app.models import ChatbotConfig, KnowledgeFile  # noqa: E402
+from app.services import llm  # noqa: E402
+from app.testing import prepare_engine, rolled_back  # noqa: E402
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -21,50 +41,62 @@ def setup_test_environment():
     - In-memory database is used for isolation
     - Settings cache is cleared
     """
-    # Set environment variables for testing
-    test_env = {
-        "DEMO_MODE": "1",  # Explicitly set to 1 for stub mode
-        "DATABASE_URL": "sqlite:///:memory:",
-        "OPENAI_API_KEY": "sk-test1234",
-        "DEBUG": "true",
-        "DEFAULT_MODEL": "gpt-4o",
-        "DEFAULT_TEMPERATURE": "0.7"
-    }
-
-    with patch.dict(os.environ, test_env):
-        # Patch OpenAI client to use stub mode
-        from unittest.mock import MagicMock
-        from app.services import llm
-
-        # Force stub mode in llm service
-        def _use_stub():
-            return True
-        llm._use_stub = _use_stub
+    # Clear the settings cache to force reload with test environment
+    get_settings.cache_clear()
+    llm.reload_env()
 
-        # Clear the settings cache to force reload with test environment
-        from app.config import get_settings
-        if hasattr(get_settings, 'cache_clear'):
-            get_settings.cache_clear()
-
-        yield
+    yield
 
-        # Clean up after tests
-        if hasattr(get_settings, 'cache_clear'):
-            get_settings.cache_clear()
+    # Clean up after tests
+    for key, value in _SAVED_ENV.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    get_settings.cache_clear()
+    llm.reload_env()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_client():
     """
     Provide a FastAPI TestClient for making HTTP requests in tests.
 
-    This fixture creates a fresh TestClient instance for each test,
-    ensuring test isolation.
+    The client holds no per-test state (database isolation is handled by
+    isolate_database), so one instance is shared by the whole session.
     """
     from app.main import app
     return TestClient(app)
 
 
+_MOCK_TOKENS = ("Test", " response", " to:")
+_DEFAULT_USAGE = {'total_tokens': 10}
+_DEFAULT_META = {'usage': _DEFAULT_USAGE, 'latency_ms': 50}
+
+
+async def _mock_chat(messages, stream=False, **kwargs):
+    user_message = messages[-1]['content'] if messages else "test"
+    content = f"Test response to: {user_message}"
+
+    # Streaming logic
+    if stream:
+        async def token_generator():
+            for token in _MOCK_TOKENS:
+                yield token
+            yield f" {user_message}"
+
+            # Simulate end of stream metadata
+            yield {
+                'content': content,
+                'usage': {'total_tokens': len(_MOCK_TOKENS) + 1},
+                'latency_ms': 50
+            }
+        return token_generator()
+
+    # Non-streaming response
+    return {**_DEFAULT_META, 'content': content}
+
+
 @pytest.fixture
 def mock_llm(monkeypatch):
     """
@@ -73,63 +105,50 @@ def mock_llm(monkeypatch):
     This fixture ensures tests don't make actual API calls and
     receive consistent, testable responses.
     """
-    def mock_chat(messages, stream=False, **kwargs):
-        user_message = messages[-1]['content'] if messages else "test"
-        mock_tokens = ["Test", " response", " to:", f" {user_message}"]
-
-        # Streaming logic
-        if stream:
-            async def token_generator():
-                for token in mock_tokens:
-                    yield token
-
-                # Simulate end of stream metadata
-                yield {
-                    'content': f"Test response to: {user_message}",
-                    'usage': {'total_tokens': len(mock_tokens)},
-                    'latency_ms': 50
-                }
-            return token_generator()
-
-        # Non-streaming response
-        return {
-            'content': f"Test response to: {user_message}",
-            'usage': {'total_tokens': 10},
-            'latency_ms': 50
-        }
-
     # Patch in the specific routes where streaming is used
     from app import services
-    with patch.object(services.llm, 'chat', side_effect=mock_chat):
-        with patch('app.routes.chat', side_effect=mock_chat):
-            yield mock_chat
+    monkeypatch.setattr(services.llm, 'chat', _mock_chat)
+    monkeypatch.setattr('app.routes.chat', _mock_chat)
+    return _mock_chat
+
+
+_SEARCH_RESULTS = [
+    {
+        'filename': 'test_doc.txt',
+        'file_id': 1,
+        'content': 'Sample knowledge content for streaming tests',
+        'score': 0.85
+    }
+]
+
+
+@pytest.fixture(scope="session")
+def _knowledge_processor_mock():
+    """Build the KnowledgeProcessor stand-in once per test session."""
+    from unittest.mock import MagicMock
+
+    return MagicMock()
 
 
 @pytest.fixture
-def mock_knowledge_processor():
+def mock_knowledge_processor(_knowledge_processor_mock, monkeypatch):
     """
     Mock the KnowledgeProcessor to return controlled results.
 
     This fixture ensures knowledge-related tests have predictable
-    search results without requiring actual file uploads.
+    search results without requiring actual file uploads. The shared
+    mock is reset before each test.
     """
-    from unittest.mock import MagicMock
+    mock_processor = _knowledge_processor_mock
+    mock_processor.search_knowledge.reset_mock()
+    mock_processor.search_knowledge.return_value = _SEARCH_RESULTS
+    mock_processor.search_knowledge.side_effect = None
 
-    mock_processor = MagicMock()
-    mock_processor.search_knowledge.return_value = [
-        {
-            'filename': 'test_doc.txt',
-            'file_id': 1,
-            'content': 'Sample knowledge content for streaming tests',
-            'score': 0.85
-        }
-    ]
+    monkeypatch.setattr('app.routes.KnowledgeProcessor', lambda: mock_processor)
+    return mock_processor
 
-    with patch('app.routes.KnowledgeProcessor', return_value=mock_processor):
-        yield mock_processor
 
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_chat_request():
     """Provide a sample chat request for testing."""
     return {
@@ -139,7 +158,7 @@ def sample_chat_request():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_feedback_request():
     """Provide a sample feedback request for testing."""
     return {
@@ -149,24 +168,18 @@ def sample_feedback_request():
     }
 
 
-@pytest.fixture(autouse=True)
-def isolate_database():
+@pytest.fixture(scope="session")
+def _schema():
     """
-    Ensure each test uses a fresh database.
+    Create the schema and seed default rows once per test session.
 
-    This fixture runs automatically and ensures database state
-    doesn't leak between tests.
+    Tests never commit to the real database: `isolate_database` wraps each
+    one in a transaction that is rolled back afterwards.
     """
-    from app.db import engine, Base
-    from sqlalchemy.orm import sessionmaker
-    from app.models import ChatbotConfig, KnowledgeFile
-
-    # Create all tables
+    prepare_engine(engine)
     Base.metadata.create_all(bind=engine)
 
-    # Create a session
-    SessionLocal = sessionmaker(bind=engine)
-    db = SessionLocal()
+    db = sessionmaker(bind=engine)()
 
     # Insert default configurations if not exist
     try:
@@ -200,7 +213,16 @@ def isolate_database():
     finally:
         db.close()
 
-    yield
+    return engine
+
+
+@pytest.fixture(autouse=True)
+def isolate_database(_schema):
+    """
+    Roll back everything a test writes.
 
-    # Clean up after test
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Each test runs inside an outer transaction on a single connection;
+    see app.testing.rolled_back.
+    """
+    with rolled_back(_schema, SessionLocal):
+        yield
@@ -0,0 +1,14 @@
+"""Tests for application settings loading."""
+
+from app.config import get_settings
+
+
+def test_settings_are_parsed_once():
+    assert get_settings() is get_settings()
+
+
+def test_cache_clear_reloads_settings():
+    first = get_settings()
+    get_settings.cache_clear()
+
+    assert get_settings() is not first
@@ -0,0 +1,91 @@
+"""Tests for knowledge file upload validation."""
+
+import hashlib
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from starlette.datastructures import UploadFile
+
+from app import routes_knowledge
+from app.migrations.add_knowledge_digest_algo import backfill_digests, run_migration
+from app.routes_knowledge import MAX_FILE_SIZE
+
+
+def test_oversized_upload_is_rejected_before_reading(test_client):
+    files = {'file': ('huge.txt', BytesIO(bytes(MAX_FILE_SIZE + 1)), 'text/plain')}
+
+    with patch.object(UploadFile, 'read') as read:
+        response = test_client.post("/api/v1/knowledge/files", files=files)
+
+    assert response.status_code == 400
+    assert "exceeds maximum allowed size" in response.json()['message']
+    read.assert_not_called()
+
+
+def test_legacy_sha256_digests_are_rehashed(tmp_path, monkeypatch):
+    blake3 = pytest.importorskip("blake3")
+    monkeypatch.setattr(routes_knowledge, "ensure_uploads_directory", lambda: str(tmp_path))
+    content = b"legacy knowledge"
+    legacy_digest = hashlib.sha256(content).hexdigest()
+    (tmp_path / f"{legacy_digest[:16]}_notes.txt").write_bytes(content)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE knowledge_files "
+                "(id INTEGER PRIMARY KEY, filename VARCHAR(255), sha256 VARCHAR(64) UNIQUE)"
+            )
+        )
+        connection.execute(
+            text("INSERT INTO knowledge_files (filename, sha256) VALUES ('notes.txt', :digest)"),
+            {"digest": legacy_digest},
+        )
+        connection.execute(
+            text("INSERT INTO knowledge_files (filename, sha256) VALUES ('gone.txt', 'f00d')")
+        )
+
+    applied = run_migration(engine)
+
+    new_digest = blake3.blake3(content).hexdigest()
+    assert "knowledge_files.sha256 (1 rehashed with blake3)" in applied
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text("SELECT filename, sha256, digest_algo FROM knowledge_files ORDER BY id")
+        ).all()
+    assert rows == [("notes.txt", new_digest, "blake3"), ("gone.txt", "f00d", "sha256")]
+    assert (tmp_path / f"{new_digest[:16]}_notes.txt").read_bytes() == content
+
+
+def test_failed_rename_leaves_the_legacy_digest(tmp_path, monkeypatch):
+    pytest.importorskip("blake3")
+    content = b"legacy knowledge"
+    legacy_digest = hashlib.sha256(content).hexdigest()
+    (tmp_path / f"{legacy_digest[:16]}_notes.txt").write_bytes(content)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE knowledge_files (id INTEGER PRIMARY KEY, filename VARCHAR(255), "
+                "sha256 VARCHAR(64) UNIQUE, digest_algo VARCHAR(16) NOT NULL DEFAULT 'sha256')"
+            )
+        )
+        connection.execute(
+            text("INSERT INTO knowledge_files (filename, sha256) VALUES ('notes.txt', :digest)"),
+            {"digest": legacy_digest},
+        )
+
+    def fail_replace(src, dst):
+        raise PermissionError(dst)
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    assert backfill_digests(engine, str(tmp_path)) == []
+
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT sha256, digest_algo FROM knowledge_files")).one()
+    assert tuple(row) == (legacy_digest, "sha256")
+    assert (tmp_path / f"{legacy_digest[:16]}_notes.txt").exists()
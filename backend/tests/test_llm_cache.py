@@ -0,0 +1,64 @@
+"""Tests for the in-process LLM response cache."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm as llm_service
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        content = f"reply {self.calls}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    completions = _FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm_service, "_use_stub", lambda: False)
+    monkeypatch.setattr(llm_service, "_get_client", lambda: client)
+    llm_service._response_cache.clear()
+    yield completions
+    llm_service._response_cache.clear()
+
+
+def test_low_temperature_reply_is_cached(fake_provider):
+    messages = [{"role": "user", "content": "Hello"}]
+
+    first = asyncio.run(llm_service.llm_chat(messages, model="gpt-4o", temperature=0.2))
+    second = asyncio.run(llm_service.llm_chat(messages, model="gpt-4o", temperature=0.2))
+
+    assert first == second == "reply 1"
+    assert fake_provider.calls == 1
+
+
+def test_cache_key_includes_messages_and_params(fake_provider):
+    asyncio.run(llm_service.llm_chat([{"role": "user", "content": "A"}], model="gpt-4o", temperature=0))
+    asyncio.run(llm_service.llm_chat([{"role": "user", "content": "B"}], model="gpt-4o", temperature=0))
+    asyncio.run(
+        llm_service.llm_chat(
+            [{"role": "user", "content": "A"}], model="gpt-4o", temperature=0, max_tokens=5
+        )
+    )
+
+    assert fake_provider.calls == 3
+
+
+def test_high_temperature_reply_is_not_cached(fake_provider):
+    messages = [{"role": "user", "content": "Tell me a story"}]
+
+    first = asyncio.run(llm_service.llm_chat(messages, model="gpt-4o", temperature=0.9))
+    second = asyncio.run(llm_service.llm_chat(messages, model="gpt-4o", temperature=0.9))
+
+    assert first != second
+    assert fake_provider.calls == 2
+    assert not llm_service._response_cache
@@ -10,6 +10,17 @@ import pytest
 import json
 from unittest.mock import AsyncMock, patch
 
+_PREFIX = b'data: '
+
+
+def _parse_sse(body: bytes) -> list[dict]:
+    """Decode the JSON payload of every ``data:`` event in an SSE body."""
+    return [
+        json.loads(event[len(_PREFIX):])
+        for event in body.split(b'\n\n')
+        if event.startswith(_PREFIX)
+    ]
+
 
 @pytest.mark.streaming
 class TestStreamingIntegration:
@@ -57,24 +68,7 @@ class TestStreamingIntegration:
             print(f"Response Content: {response.content}")
             print(f"Response Headers: {dict(response.headers)}")
 
-            # Attempt to parse line by line with debug information
-            streamed_data = []
-            full_content = str(response.content, 'utf-8')
-            print(f"Full Content: {full_content}")
-
-            lines = full_content.split('\n\n')
-            print(f"Lines Found: {len(lines)}")
-
-            for line in lines:
-                print(f"Processing Line: {line}")
-                if line.startswith('data: '):
-                    try:
-                        data = json.loads(line[6:])
-                        streamed_data.append(data)
-                        print(f"Parsed Data: {data}")
-                    except json.JSONDecodeError as e:
-                        print(f"JSON Decode Error: {e}")
-                        print(f"Failed Line: {line}")
+            streamed_data = _parse_sse(response.content)
 
             # Validate streaming sequence
             print(f"Streamed Data Length: {len(streamed_data)}")
@@ -109,14 +103,7 @@ class TestStreamingIntegration:
         response = test_client.post("/api/v1/chat", json=payload)
 
         # Collect streamed data
-        streamed_data = []
-        for line in str(response.content, 'utf-8').split('\n\n'):
-            if line.startswith('data: '):
-                try:
-                    data = json.loads(line[6:])
-                    streamed_data.append(data)
-                except json.JSONDecodeError:
-                    pass
+        streamed_data = _parse_sse(response.content)
 
         # Validate knowledge sources
         sources_data = [data for data in streamed_data if 'knowledge_sources' in data]
@@ -140,14 +127,7 @@ class TestStreamingIntegration:
             response = test_client.post("/api/v1/chat", json=payload)
 
             # Collect streamed data
-            streamed_data = []
-            for line in str(response.content, 'utf-8').split('\n\n'):
-                if line.startswith('data: '):
-                    try:
-                        data = json.loads(line[6:])
-                        streamed_data.append(data)
-                    except json.JSONDecodeError:
-                        pass
+            streamed_data = _parse_sse(response.content)
 
             # Last data should indicate an error
             assert len(streamed_data) > 0
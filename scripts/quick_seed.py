@@ -1,16 +1,20 @@
 import os, json
 from sqlalchemy import text
 from backend.app.db import Base, engine
+from backend.app import models  # noqa: F401  (registers tables on Base.metadata)
+
+# Seed values, serialized once
+CFG_JSON = json.dumps({"model": "gpt-4o-mini", "temperature": 0.2})
+TAGS_JSON = json.dumps(["default"])
 
 # 1) Create all tables
 Base.metadata.create_all(bind=engine)
 
-# 2) Ensure there is one active chatbot_config
-cfg = {"model": "gpt-4o-mini", "temperature": 0.2}
+# 2) Ensure there is one active chatbot_config (a single guarded INSERT)
 with engine.begin() as conn:
     conn.execute(text("""
         INSERT INTO chatbot_config (name, config_json, is_active, tags, created_at)
         SELECT :n, :j, 1, :t, CURRENT_TIMESTAMP
         WHERE NOT EXISTS (SELECT 1 FROM chatbot_config WHERE is_active=1)
-    """), {"n": "default", "j": json.dumps(cfg), "t": json.dumps(["default"])})
+    """), {"n": "default", "j": CFG_JSON, "t": TAGS_JSON})
 print("✅ DB ready: tables created and default config ensured.")
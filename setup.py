@@ -6,8 +6,10 @@ Runs migrations/init, seeds active config, and runs tests
 
 import argparse
 import os
+import sqlite3
 import subprocess
 import sys
+from contextlib import closing
 from pathlib import Path
 
 def run_command(cmd, cwd=None, shell=False):
@@ -26,16 +28,17 @@ def run_command(cmd, cwd=None, shell=False):
         return False, e.stderr
 
 def write_step(message):
-    """Print step message"""
-    print(f"\033[92m==> {message}\033[0m")
+    """Print step message and flush, since a slow step usually follows"""
+    sys.stdout.write(f"\033[92m==> {message}\033[0m\n")
+    sys.stdout.flush()
 
 def write_error(message):
     """Print error message"""
-    print(f"\033[91mERROR: {message}\033[0m")
+    sys.stdout.write(f"\033[91mERROR: {message}\033[0m\n")
 
 def write_success(message):
     """Print success message"""
-    print(f"\033[92mSUCCESS: {message}\033[0m")
+    sys.stdout.write(f"\033[92mSUCCESS: {message}\033[0m\n")
 
 def main():
     parser = argparse.ArgumentParser(description='Setup Data Flywheel Chatbot')
@@ -52,43 +55,24 @@ def main():
 
     backend_dir = script_dir / 'backend'
     
-    # Step 1: Database Migration
-    write_step("Initializing database and applying migrations")
+    # Steps 1-2: Database init, migration and config seeding.
+    # One interpreter runs all three so SQLAlchemy and the app modules are
+    # imported only once.
+    write_step("Initializing database, applying migrations and seeding active configuration")
     
-    # Initialize database
-    success, output = run_command([
-        sys.executable, '-c', 
-        'from app.init_db import init_database; init_database()'
-    ], cwd=backend_dir)
-    
-    if success:
-        write_success("Database initialized successfully")
-    else:
-        write_error(f"Failed to initialize database: {output}")
-        return 1
-
-    # Apply migration
-    write_step("Applying database migration")
-    success, output = run_command([
-        sys.executable, '-c',
-        "from app.migrations.add_session_columns import run_migration; run_migration('chatbot.db')"
-    ], cwd=backend_dir)
-    
-    if success:
-        write_success("Database migration completed")
-    else:
-        write_error(f"Failed to apply migration: {output}")
-        return 1
-
-    # Step 2: Seed Configuration  
-    write_step("Seeding active configuration")
-    
-    seed_script = """
+    setup_script = """
 import sys
 sys.path.append('.')
+from app.init_db import init_database
+from app.migrations.add_session_columns import run_migration
 from app.db import SessionLocal
 from app.models import ChatbotConfig
-import json
+
+init_database()
+print('Database initialized')
+
+run_migration('chatbot.db')
+print('Database migration completed')
 
 session = SessionLocal()
 try:
@@ -115,33 +99,28 @@ finally:
 """
     
     success, output = run_command([
-        sys.executable, '-c', seed_script
+        sys.executable, '-c', setup_script
     ], cwd=backend_dir)
     
     if success:
-        write_success("Configuration seeded successfully")
+        write_success("Database initialized, migrated and seeded successfully")
         if output.strip():
             print(f"  {output.strip()}")
     else:
-        write_error(f"Failed to seed configuration: {output}")
+        write_error(f"Failed to set up database: {output}")
         return 1
 
     # Step 3: Verify Schema
     write_step("Verifying database schema")
     
-    try:
-        success, output = run_command([
-            'sqlite3', 'chatbot.db', 'PRAGMA table_info(chat_history);'
-        ], cwd=backend_dir)
-        
-        if success and 'session_id' in output and 'role' in output and 'content' in output:
-            write_success("Database schema verified - all required columns present")
-        else:
-            write_error("Schema verification failed - missing required columns")
-            return 1
-    except FileNotFoundError:
-        # sqlite3 not available, skip verification
-        print("  \033[93mWARNING: sqlite3 not found, skipping schema verification\033[0m")
+    with closing(sqlite3.connect(backend_dir / 'chatbot.db')) as conn:
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(chat_history)')}
+    
+    if {'session_id', 'role', 'content'}.issubset(columns):
+        write_success("Database schema verified - all required columns present")
+    else:
+        write_error("Schema verification failed - missing required columns")
+        return 1
 
     # Step 4: Run Tests (unless skipped)
     if not args.skip_tests:
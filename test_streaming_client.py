@@ -1,6 +1,35 @@
 import requests
 import json
+import time
 import traceback
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+# Shared keep-alive session; the pool keeps the socket warm between reads
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.1)
+))
+
+
+def _parse_frame(payload: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _pretty(data: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
 
 def test_streaming():
     url = "http://localhost:8000/api/v1/chat"
@@ -19,7 +48,8 @@ def test_streaming():
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, stream=True)
+        started = time.perf_counter()
+        response = SESSION.post(url, json=payload, headers=headers, stream=True)
 
         print("Response Status Code:", response.status_code)
         print("Response Headers:", dict(response.headers))
@@ -27,21 +57,29 @@ def test_streaming():
 
         if response.status_code == 200:
             print("Streaming Started:")
-            # Read entire response content for debugging
-            content = response.content.decode('utf-8')
-            print("Full Response Content:")
-            print(content)
-
-            # Try parsing lines
-            for line in content.split('\n\n'):
-                if line.startswith('data: '):
-                    try:
-                        data = json.loads(line[6:])
-                        print("Parsed Data:")
-                        print(json.dumps(data, indent=2))
-                    except Exception as e:
-                        print(f"Error parsing line: {e}")
-                        print("Problematic Line:", line)
+            first_frame_at = None
+            frames = 0
+
+            # Parse each SSE frame as it arrives instead of buffering the body
+            for frame in response.iter_lines(chunk_size=None, delimiter=b'\n\n'):
+                if not frame.startswith(b'data: '):
+                    continue
+                if first_frame_at is None:
+                    first_frame_at = time.perf_counter()
+                frames += 1
+                try:
+                    data = _parse_frame(frame[6:])
+                    print("Parsed Data:")
+                    print(_pretty(data))
+                except Exception as e:
+                    print(f"Error parsing line: {e}")
+                    print("Problematic Line:", frame)
+
+            finished = time.perf_counter()
+            print(f"Frames received: {frames}")
+            if first_frame_at is not None:
+                print(f"Time to first frame: {(first_frame_at - started) * 1000:.1f} ms")
+            print(f"Total stream time: {(finished - started) * 1000:.1f} ms")
         else:
             print("Error Status Code:", response.status_code)
             print("Error Response Text:", response.text)
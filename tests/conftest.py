@@ -6,15 +6,31 @@ tests run in isolation with controlled environments.
 """
 
 import os
-import sys
 import pytest
-from unittest.mock import patch
 from fastapi.testclient import TestClient
 
-# Add backend app to Python path for imports
-backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
-sys.path.insert(0, backend_path)
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Each pytest-xdist worker gets its own in-memory database
+_WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+
+# Environment variables for testing. They are applied before the app is
+# imported below, so app.db builds its engine from the test database URL.
+_TEST_ENV = {
+    "DEMO_MODE": "true",
+    "DATABASE_URL": f"sqlite:///file:memdb_{_WORKER_ID}?mode=memory&cache=shared&uri=true",
+    "OPENAI_API_KEY": "test-key-for-testing",
+    "DEBUG": "true",
+    "DEFAULT_MODEL": "gpt-4o",
+    "DEFAULT_TEMPERATURE": "0.7"
+}
+_SAVED_ENV = {key: os.environ.get(key) for key in _TEST_ENV}
+os.environ.update(_TEST_ENV)
+
+from app import models, routes, routes_knowledge  # noqa: E402,F401  (models registers tables on Base.metadata)
+from app.config import get_settings  # noqa: E402
+from app.db import engine, Base, SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import llm  # noqa: E402
+from app.testing import prepare_engine, rolled_back  # noqa: E402
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -24,79 +40,102 @@ def setup_test_environment():
 
     This fixture runs automatically for all tests and ensures:
     - Demo mode is enabled for predictable responses
-    - In-memory database is used for isolation
+    - A shared-cache in-memory database is used per xdist worker, so
+      every connection sees the schema created once per session
     - Settings cache is cleared
     """
-    # Set environment variables for testing
-    test_env = {
-        "DEMO_MODE": "true",
-        "DATABASE_URL": "sqlite:///:memory:",
-        "OPENAI_API_KEY": "test-key-for-testing",
-        "DEBUG": "true",
-        "DEFAULT_MODEL": "gpt-4o",
-        "DEFAULT_TEMPERATURE": "0.7"
-    }
-
-    with patch.dict(os.environ, test_env):
-        # Clear the settings cache to force reload with test environment
-        from app.config import get_settings
-        if hasattr(get_settings, 'cache_clear'):
-            get_settings.cache_clear()
+    # Clear the settings cache to force reload with test environment
+    get_settings.cache_clear()
+    llm.reload_env()
 
-        yield
+    yield
 
-        # Clean up after tests
-        if hasattr(get_settings, 'cache_clear'):
-            get_settings.cache_clear()
+    # Clean up after tests
+    for key, value in _SAVED_ENV.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    get_settings.cache_clear()
+    llm.reload_env()
 
 
-@pytest.fixture
-def test_client():
+@pytest.fixture(scope="session")
+def test_client(_schema):
     """
     Provide a FastAPI TestClient for making HTTP requests in tests.
 
-    This fixture creates a fresh TestClient instance for each test,
-    ensuring test isolation.
+    The client holds no per-test state (database isolation is handled by
+    the `db` fixture), so one instance is shared by the whole session.
+    Entering it runs the app's lifespan startup and shutdown once. The
+    engine is prepared first, so the DEMO_MODE seed written at startup
+    stays in the shared in-memory database for every later test.
     """
-    from app.main import app
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
+
+
+_LLM_CONST_RESPONSE = {'usage': {'total_tokens': 10}, 'latency_ms': 50}
+
+
+async def _mock_chat(messages, **kwargs):
+    user_message = messages[-1]['content'] if messages else "test"
+    return {'content': f"Test response to: {user_message}", **_LLM_CONST_RESPONSE}
 
 
 @pytest.fixture
-def mock_llm():
+def mock_llm(monkeypatch):
     """
     Mock the LLM service to return predictable responses in tests.
 
     This fixture ensures tests don't make actual API calls and
-    receive consistent, testable responses.
+    receive consistent, testable responses. The stand-in only applies to
+    tests that request it and is removed when each one finishes.
+    """
+    monkeypatch.setattr(llm, "chat", _mock_chat)
+    monkeypatch.setattr(routes, "chat", _mock_chat)
+    return _mock_chat
+
+
+@pytest.fixture(scope="package", autouse=True)
+def _uploads_dir(tmp_path_factory):
     """
-    def mock_chat(messages, **kwargs):
-        user_message = messages[-1]['content'] if messages else "test"
-        return {
-            'content': f"Test response to: {user_message}",
-            'usage': {'total_tokens': 10},
-            'latency_ms': 50
-        }
+    Save knowledge uploads under this worker's pytest temp directory.
+
+    Uploads are named by content digest, so xdist workers uploading the
+    same sample would otherwise race on one file in ./uploads.
+    """
+    uploads_dir = tmp_path_factory.mktemp("uploads")
+    original = routes_knowledge.ensure_uploads_directory
+    routes_knowledge.ensure_uploads_directory = lambda: str(uploads_dir)
+
+    yield uploads_dir
+
+    routes_knowledge.ensure_uploads_directory = original
 
-    with patch('app.services.llm.chat', side_effect=mock_chat):
-        yield mock_chat
+
+class _StubKnowledgeProcessor:
+    """Stand-in for KnowledgeProcessor; search returns `results`."""
+
+    def __init__(self):
+        self.results = []
+
+    def search_knowledge(self, *args, **kwargs):
+        return self.results
 
 
 @pytest.fixture
-def mock_knowledge_processor():
+def mock_knowledge_processor(monkeypatch):
     """
     Mock the KnowledgeProcessor to return controlled results.
 
     This fixture ensures knowledge-related tests have predictable
-    search results without requiring actual file uploads.
+    search results without requiring actual file uploads. Tests set
+    `results` on the stub; each test gets a fresh one.
     """
-    from unittest.mock import MagicMock
-
-    mock_processor = MagicMock()
-    mock_processor.search_knowledge.return_value = []
-
-    with patch('app.routes.KnowledgeProcessor', return_value=mock_processor):
-        yield mock_processor
+    stub = _StubKnowledgeProcessor()
+    monkeypatch.setattr(routes, "KnowledgeProcessor", lambda *args, **kwargs: stub)
+    return stub
 
 
 @pytest.fixture
@@ -119,20 +158,33 @@ def sample_feedback_request():
     }
 
 
-@pytest.fixture(autouse=True)
-def isolate_database():
+@pytest.fixture(scope="session")
+def _schema():
     """
-    Ensure each test uses a fresh database.
+    Create the schema once per test session.
 
-    This fixture runs automatically and ensures database state
-    doesn't leak between tests.
+    Tests never commit to the real database: `db` wraps each
+    one in a transaction that is rolled back afterwards.
     """
-    from app.db import engine, Base
-
-    # Create all tables
+    prepare_engine(engine)
     Base.metadata.create_all(bind=engine)
+    return engine
 
-    yield
 
-    # Clean up after test
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+@pytest.fixture
+def db(_schema):
+    """
+    Roll back everything a test writes.
+
+    Only tests that touch the database need this: request the fixture or
+    mark the test with `@pytest.mark.db`.
+    """
+    with rolled_back(_schema, SessionLocal):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _db_marker(request):
+    """Activate the `db` fixture for tests marked `@pytest.mark.db`."""
+    if request.node.get_closest_marker("db"):
+        request.getfixturevalue("db")
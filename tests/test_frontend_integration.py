@@ -4,10 +4,18 @@ Tests the API functionality using TestClient for proper isolation.
 """
 
 import pytest
-import json
-import tempfile
-import os
-from io import BytesIO
+
+_FRONTEND_ORIGIN = "http://localhost:8000"
+_PREFLIGHT_HEADERS = {
+    "Origin": _FRONTEND_ORIGIN,
+    "Access-Control-Request-Method": "POST",
+}
+_CHAT_PAYLOAD = {"message": "Hello from frontend test"}
+_FEEDBACK_PAYLOAD = {
+    "message": "Test message for frontend feedback",
+    "user_feedback": "thumbs_up",
+    "comment": "Frontend integration test"
+}
 
 
 @pytest.mark.frontend
@@ -58,17 +66,16 @@ class TestFrontendIntegration:
 
     # API Accessibility Tests
 
-    def test_api_endpoints_accessible(self, test_client):
+    @pytest.mark.parametrize("endpoint,expected_status", [
+        ("/health", 200),
+        ("/version", 200),
+    ])
+    def test_api_endpoints_accessible(self, test_client, endpoint, expected_status):
         """Test that API endpoints are accessible."""
-        endpoints = [
-            ("/health", 200),
-            ("/version", 200),
-        ]
-
-        for endpoint, expected_status in endpoints:
-            response = test_client.get(endpoint)
-            assert response.status_code == expected_status, f"Endpoint {endpoint} failed"
+        response = test_client.get(endpoint)
+        assert response.status_code == expected_status, f"Endpoint {endpoint} failed"
 
+    @pytest.mark.db
     @pytest.mark.skip(reason="Endpoint requires authentication - needs auth setup for tests")
     def test_chat_history_endpoint(self, test_client):
         """Test chat history endpoint accessibility."""
@@ -79,30 +86,26 @@ class TestFrontendIntegration:
 
     # Frontend-Backend Integration Tests
 
+    @pytest.mark.db
     def test_chat_api_integration(self, test_client, mock_llm):
         """Test that chat API works correctly."""
-        payload = {"message": "Hello from frontend test"}
-        response = test_client.post("/api/v1/chat", json=payload)
+        response = test_client.post("/api/v1/chat", json=_CHAT_PAYLOAD)
 
         assert response.status_code == 200
         data = response.json()
         assert "reply" in data
         assert len(data["reply"]) > 0
 
+    @pytest.mark.db
     def test_feedback_submission(self, test_client):
         """Test feedback submission."""
-        payload = {
-            "message": "Test message for frontend feedback",
-            "user_feedback": "thumbs_up",
-            "comment": "Frontend integration test"
-        }
-
-        response = test_client.post("/api/v1/feedback", json=payload)
+        response = test_client.post("/api/v1/feedback", json=_FEEDBACK_PAYLOAD)
 
         assert response.status_code == 201
         data = response.json()
         assert "status" in data or "message" in data
 
+    @pytest.mark.db
     @pytest.mark.skip(reason="Chat history endpoint requires authentication - needs auth token setup")
     def test_chat_history_loading(self, test_client, mock_llm):
         """Test chat history loading after sending a message."""
@@ -119,6 +122,7 @@ class TestFrontendIntegration:
 
     # Error Handling Tests
 
+    @pytest.mark.db
     @pytest.mark.skip(reason="Empty message validation causes internal error - needs backend fix")
     def test_invalid_chat_request(self, test_client):
         """Test that invalid chat requests are handled properly."""
@@ -129,6 +133,7 @@ class TestFrontendIntegration:
         data = response.json()
         assert "detail" in data or "message" in data
 
+    @pytest.mark.db
     @pytest.mark.skip(reason="Validation error handling causes internal error - needs backend validation improvement")
     def test_validation_error_format(self, test_client):
         """Test that validation errors are properly formatted."""
@@ -141,18 +146,17 @@ class TestFrontendIntegration:
         data = response.json()
         assert "detail" in data
 
-    def test_invalid_feedback_payload(self, test_client):
+    @pytest.mark.parametrize("payload", [
+        {"message": "", "user_feedback": "thumbs_up"},  # Empty message
+        {"message": "test", "user_feedback": "invalid_feedback"},  # Invalid feedback type
+        {"user_feedback": "thumbs_up"},  # Missing message
+    ])
+    def test_invalid_feedback_payload(self, test_client, payload):
         """Test feedback with invalid payload."""
-        invalid_payloads = [
-            {"message": "", "user_feedback": "thumbs_up"},  # Empty message
-            {"message": "test", "user_feedback": "invalid_feedback"},  # Invalid feedback type
-            {"user_feedback": "thumbs_up"},  # Missing message
-        ]
-
-        for payload in invalid_payloads:
-            response = test_client.post("/api/v1/feedback", json=payload)
-            assert response.status_code in [400, 422]
+        response = test_client.post("/api/v1/feedback", json=payload)
+        assert response.status_code in [400, 422]
 
+    @pytest.mark.db
     @pytest.mark.skip(reason="Chat history endpoint requires authentication")
     def test_chat_history_with_invalid_limit(self, test_client):
         """Test chat history with invalid limit parameters."""
@@ -166,6 +170,14 @@ class TestFrontendIntegration:
 
     # Content Security Tests
 
+    def test_cors_preflight(self, test_client):
+        """Test that the frontend origin passes the CORS preflight."""
+        response = test_client.options("/api/v1/chat", headers=_PREFLIGHT_HEADERS)
+
+        assert response.status_code == 200
+        assert response.headers.get("access-control-allow-origin") == _FRONTEND_ORIGIN
+
+    @pytest.mark.db
     @pytest.mark.skip(reason="Chat history endpoint requires authentication")
     def test_api_response_headers(self, test_client):
         """Test that API responses have appropriate headers."""
@@ -176,6 +188,7 @@ class TestFrontendIntegration:
 
     # Integration Workflow Test
 
+    @pytest.mark.db
     @pytest.mark.skip(reason="History endpoints require authentication - needs auth setup for full workflow")
     def test_full_workflow_simulation(self, test_client, mock_llm):
         """Test complete workflow as frontend would execute it."""